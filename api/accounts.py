@@ -1,6 +1,7 @@
-import requests
 import configparser
 
+from api import transport
+
 def load_api_key(filepath):
     """Load the API key from a configuration file."""
     config = configparser.ConfigParser()
@@ -18,7 +19,7 @@ def get_account_balance(address):
         'tag': 'latest',
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     data = response.json()
     return data
 
@@ -38,7 +39,7 @@ def get_multiple_address_balances(addresses):
         'tag': 'latest',
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_transactions_by_address(address, startblock=0, endblock=99999999, page=1, offset=10, sort='asc'):
@@ -66,7 +67,7 @@ def get_transactions_by_address(address, startblock=0, endblock=99999999, page=1
         'sort': sort,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_internal_transactions(address, startblock=0, endblock=2702578, page=1, offset=10, sort='asc'):
@@ -94,7 +95,7 @@ def get_internal_transactions(address, startblock=0, endblock=2702578, page=1, o
         'sort': sort,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_internal_transactions_by_hash(txhash):
@@ -112,7 +113,7 @@ def get_internal_transactions_by_hash(txhash):
         'txhash': txhash,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_internal_transactions_by_block_range(startblock, endblock, page=1, offset=10, sort='asc'):
@@ -138,7 +139,7 @@ def get_internal_transactions_by_block_range(startblock, endblock, page=1, offse
         'sort': sort,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_erc20_token_transfers(address, contractaddress=None, startblock=0, endblock=27025780, page=1, offset=100, sort='asc'):
@@ -168,7 +169,7 @@ def get_erc20_token_transfers(address, contractaddress=None, startblock=0, endbl
         'sort': sort,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_erc721_token_transfers(address, contractaddress=None, startblock=0, endblock=27025780, page=1, offset=100, sort='asc'):
@@ -198,7 +199,7 @@ def get_erc721_token_transfers(address, contractaddress=None, startblock=0, endb
         'sort': sort,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_erc1155_token_transfers(address, contractaddress=None, startblock=0, endblock=99999999, page=1, offset=100, sort='asc'):
@@ -228,7 +229,7 @@ def get_erc1155_token_transfers(address, contractaddress=None, startblock=0, end
         'sort': sort,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_mined_blocks(address, blocktype='blocks', page=1, offset=10):
@@ -252,7 +253,7 @@ def get_mined_blocks(address, blocktype='blocks', page=1, offset=10):
         'offset': offset,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_beacon_chain_withdrawals(address, startblock=0, endblock=99999999, page=1, offset=100, sort='asc'):
@@ -280,7 +281,7 @@ def get_beacon_chain_withdrawals(address, startblock=0, endblock=99999999, page=
         'sort': sort,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_historical_ether_balance(address, blockno):
@@ -300,7 +301,7 @@ def get_historical_ether_balance(address, blockno):
         'blockno': blockno,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 if __name__ == "__main__":
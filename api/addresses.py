@@ -0,0 +1,65 @@
+def normalize_address(address):
+    """
+    Converts an Ethereum address to its 20-byte key, whatever its casing.
+
+    :param address: Address as a hex string, with or without the 0x prefix.
+    :return: The 20 raw bytes of the address.
+    """
+    hex_part = address[2:] if address[:2] in ('0x', '0X') else address
+    if len(hex_part) != 40:
+        raise ValueError(f"Invalid Ethereum address: {address!r}")
+    try:
+        key = bytes.fromhex(hex_part)
+    except ValueError:
+        key = b''
+    # bytes.fromhex skips whitespace, so a padded string decodes to fewer than 20 bytes
+    if len(key) != 20:
+        raise ValueError(f"Invalid Ethereum address: {address!r}")
+    return key
+
+class AddressTable:
+    """
+    Interns Ethereum addresses as dense integer ids.
+
+    Every address is stored once as its 20-byte key, so two spellings of the same address (checksummed,
+    lower case, upper case) always get the same id. Ids are assigned in insertion order starting at 0,
+    which makes them usable as list or array indices.
+
+    A table only grows, so create one per unit of work (a dashboard run, a report) rather than keeping
+    one for the lifetime of the process.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, address):
+        try:
+            return normalize_address(address) in self.ids
+        except ValueError:
+            return False
+
+    def intern(self, address):
+        """Returns the id of an address, assigning the next free id if the address is new."""
+        key = normalize_address(address)
+        address_id = self.ids.get(key)
+        if address_id is None:
+            address_id = len(self.keys)
+            self.ids[key] = address_id
+            self.keys.append(key)
+        return address_id
+
+    def lookup(self, address):
+        """Returns the id of an address, or None if it has never been interned."""
+        return self.ids.get(normalize_address(address))
+
+    def key(self, address_id):
+        """Returns the 20-byte key of an id."""
+        return self.keys[address_id]
+
+    def address(self, address_id):
+        """Returns the lower case 0x-prefixed address of an id."""
+        return '0x' + self.keys[address_id].hex()
@@ -1,6 +1,7 @@
-import requests
 import configparser
 
+from api import transport
+
 def load_api_key(filepath):
     """Load the API key from a configuration file."""
     config = configparser.ConfigParser()
@@ -30,7 +31,7 @@ def get_event_logs_by_address(address, fromBlock, toBlock, page=1, offset=1000):
         'offset': offset,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_event_logs_by_topics(fromBlock, toBlock, topics, page=1, offset=1000):
@@ -59,7 +60,7 @@ def get_event_logs_by_topics(fromBlock, toBlock, topics, page=1, offset=1000):
     # Merge topic filters into the parameters
     params.update(topics)
     
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_event_logs_by_address_and_topics(address, fromBlock, toBlock, topics, page=1, offset=1000):
@@ -90,7 +91,7 @@ def get_event_logs_by_address_and_topics(address, fromBlock, toBlock, topics, pa
     # Merge topic filters into the parameters
     params.update(topics)
     
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 if __name__ == "__main__":
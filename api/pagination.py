@@ -0,0 +1,153 @@
+import threading
+import time
+
+# Etherscan refuses pages beyond page * offset = 10000 records
+MAX_RESULT_WINDOW = 10000
+
+# Reasons returned by iterate_pages once it stops
+NO_MORE_RECORDS = 'no_more_records'
+WINDOW_USED_UP = 'window_used_up'
+
+class RateLimiter:
+    """
+    Spaces out calls shared by several threads so that at most `rate` start in any one second.
+
+    :param rate: Maximum number of calls per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_call = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the caller may make its call."""
+        with self.lock:
+            now = time.monotonic()
+            call_at = max(self.next_call, now)
+            self.next_call = call_at + self.interval
+        if call_at > now:
+            time.sleep(call_at - now)
+
+def is_rate_limited(data):
+    """Tells whether an Etherscan reply is a rate limit refusal, e.g. "Max rate limit reached"."""
+    return data.get('status') == '0' and 'rate limit' in str(data.get('result', '')).lower()
+
+def rate_limited(fetch_page, limiter, retries=5, backoff=1.0):
+    """
+    Wraps an api function so its calls go through a shared RateLimiter and are retried on refusals.
+
+    :param fetch_page: Api function to wrap.
+    :param limiter: RateLimiter shared by every caller of the Etherscan API key.
+    :param retries: Number of retries after a rate limit reply before giving up.
+    :param backoff: Seconds to wait before the first retry, doubled for each further retry.
+    :return: Function with the same arguments as fetch_page.
+    """
+    def fetch(**kwargs):
+        delay = backoff
+        for attempt in range(retries + 1):
+            limiter.wait()
+            data = fetch_page(**kwargs)
+            if not is_rate_limited(data) or attempt == retries:
+                return data
+            time.sleep(delay)
+            delay *= 2
+    fetch.__name__ = fetch_page.__name__
+    return fetch
+
+def page_result(data, page):
+    """
+    Returns the record list of an Etherscan page reply, or None once the records run out.
+
+    :param data: Decoded JSON reply.
+    :param page: Page number the reply answers, used in error messages.
+    :return: List of records, None when there are no more records.
+    """
+    result = data.get('result')
+    if data.get('status') == '0':
+        # Etherscan answers status '0' with a "No ... found" message once the records run out
+        if str(data.get('message', '')).startswith('No '):
+            return None
+        raise RuntimeError(f"Etherscan error on page {page}: {data.get('message')} ({result})")
+    if not isinstance(result, list) or not result:
+        return None
+    return result
+
+def iterate_pages(fetch_page, page=1, offset=100, **kwargs):
+    """
+    Yields the result list of every page returned by a paginated Etherscan endpoint.
+
+    Pages are requested one at a time, so only the page currently being processed is held in memory.
+    Iteration stops at the first empty page, at a page shorter than offset, before the first page that
+    would go beyond MAX_RESULT_WINDOW, or when Etherscan reports that no more records exist. Any other
+    error reported by Etherscan (rate limits, invalid parameters) raises a RuntimeError instead of
+    silently truncating the results.
+
+    :param fetch_page: One of the api functions accepting page and offset, e.g. get_erc20_token_transfers.
+    :param page: Page number to start from.
+    :param offset: Number of records requested per page.
+    :param kwargs: Remaining arguments forwarded to fetch_page (address, startblock, ...).
+    :return: Generator of (page, result list) tuples. Its return value, carried by StopIteration, is
+             WINDOW_USED_UP when the next page would go beyond the result window, NO_MORE_RECORDS otherwise.
+    """
+    if offset > MAX_RESULT_WINDOW:
+        raise ValueError(f"offset cannot exceed the Etherscan result window of {MAX_RESULT_WINDOW}")
+    while True:
+        result = page_result(fetch_page(page=page, offset=offset, **kwargs), page)
+        if result is None:
+            return NO_MORE_RECORDS
+        yield page, result
+        if len(result) < offset:
+            return NO_MORE_RECORDS
+        if (page + 1) * offset > MAX_RESULT_WINDOW:
+            return WINDOW_USED_UP
+        page += 1
+
+def block_number(record):
+    """Returns the block number of a record, given either in decimal or as a 0x-prefixed hex string."""
+    return int(record['blockNumber'], 0)
+
+def iterate_block_range(fetch_page, block_param='startblock', start_block=0, skip=0, offset=1000, **kwargs):
+    """
+    Yields every record of a block-ordered endpoint, crawling past the Etherscan result window.
+
+    Etherscan refuses requests beyond MAX_RESULT_WINDOW records, so whenever a window is used up the
+    crawl restarts from the last block seen, skipping the records of that block already yielded.
+    fetch_page must return records in ascending block order.
+
+    :param fetch_page: Paginated api function with a starting block argument.
+    :param block_param: Name of the starting block argument, 'startblock' or 'fromBlock'.
+    :param start_block: Block to start the crawl from.
+    :param skip: Number of records of start_block to skip, as returned in a previous cursor.
+    :param offset: Number of records requested per page.
+    :param kwargs: Remaining arguments forwarded to fetch_page.
+    :return: Generator of (records, cursor) tuples, cursor being the (block, skip) pair to resume after records.
+    """
+    block = start_block
+    cursor_block, cursor_skip = start_block, skip
+    while True:
+        pages = iterate_pages(fetch_page, offset=offset, **{block_param: block}, **kwargs)
+        while True:
+            try:
+                _, result = next(pages)
+            except StopIteration as stop:
+                stop_reason = stop.value
+                break
+            records = []
+            for record in result:
+                number = block_number(record)
+                if number == block and skip:
+                    skip -= 1
+                    continue
+                if number == cursor_block:
+                    cursor_skip += 1
+                else:
+                    cursor_block, cursor_skip = number, 1
+                records.append(record)
+            if records:
+                yield records, (cursor_block, cursor_skip)
+        if stop_reason != WINDOW_USED_UP:
+            return
+        if cursor_block == block:
+            raise RuntimeError(f"Block {block} holds more records than the Etherscan result window")
+        block, skip = cursor_block, cursor_skip
@@ -1,6 +1,7 @@
-import requests
 import configparser
 
+from api import transport
+
 def load_api_key(filepath):
     """Load the API key from a configuration file."""
     config = configparser.ConfigParser()
@@ -22,7 +23,7 @@ def get_erc20_token_total_supply(contractaddress):
         'contractaddress': contractaddress,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_erc20_token_balance(contractaddress, address):
@@ -43,7 +44,7 @@ def get_erc20_token_balance(contractaddress, address):
         'tag': 'latest',  # Use 'latest' for the most recent balance
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_historical_erc20_token_supply(contractaddress, blockno):
@@ -63,7 +64,7 @@ def get_historical_erc20_token_supply(contractaddress, blockno):
         'blockno': blockno,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_historical_erc20_token_balance(contractaddress, address, blockno):
@@ -85,7 +86,7 @@ def get_historical_erc20_token_balance(contractaddress, address, blockno):
         'blockno': blockno,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_token_holder_list(contractaddress, page=1, offset=10):
@@ -107,7 +108,7 @@ def get_token_holder_list(contractaddress, page=1, offset=10):
         'offset': offset,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_token_info(contractaddress):
@@ -125,7 +126,7 @@ def get_token_info(contractaddress):
         'contractaddress': contractaddress,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_address_erc20_token_holdings(address, page=1, offset=100):
@@ -147,7 +148,7 @@ def get_address_erc20_token_holdings(address, page=1, offset=100):
         'offset': offset,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_address_erc721_token_holdings(address, page=1, offset=100):
@@ -169,7 +170,7 @@ def get_address_erc721_token_holdings(address, page=1, offset=100):
         'offset': offset,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def get_address_erc721_inventory(address, contractaddress, page=1, offset=100):
@@ -193,7 +194,7 @@ def get_address_erc721_inventory(address, contractaddress, page=1, offset=100):
         'offset': offset,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 if __name__ == "__main__":
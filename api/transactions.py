@@ -1,6 +1,7 @@
-import requests
 import configparser
 
+from api import transport
+
 def load_api_key(filepath):
     """Load the API key from a configuration file."""
     config = configparser.ConfigParser()
@@ -35,7 +36,7 @@ def get_event_logs_by_address_and_topics(address, fromBlock, toBlock, topics, pa
     # Merge topic filters into the parameters
     params.update(topics)
     
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 def check_transaction_receipt_status(txhash):
@@ -53,7 +54,7 @@ def check_transaction_receipt_status(txhash):
         'txhash': txhash,
         'apikey': api_key
     }
-    response = requests.get(url, params=params)
+    response = transport.get(url, params=params)
     return response.json()
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+
+TRANSPORT_MODES = ('live', 'record', 'replay')
+
+def check_mode(mode):
+    """Returns mode if it is a known transport mode, so a typo never silently falls back to live traffic."""
+    if mode not in TRANSPORT_MODES:
+        raise ValueError(f"Unknown transport mode: {mode!r}, expected one of {', '.join(TRANSPORT_MODES)}")
+    return mode
+
+# Transport settings shared by every api module. The mode is one of:
+#   'live'   - plain requests to Etherscan
+#   'record' - requests to Etherscan, every request and response is stored in the archive
+#   'replay' - responses are served from the archive without touching the network
+settings = {
+    'mode': check_mode(os.environ.get('ETHERSCAN_TRANSPORT', 'live')),
+    'archive_path': os.environ.get('ETHERSCAN_ARCHIVE', 'etherscan_archive.sqlite'),
+    'reproduce_latency': os.environ.get('ETHERSCAN_REPLAY_LATENCY', '') == '1',
+}
+
+# Query parameters left out of the archive and of the request key
+IGNORED_PARAMS = {'apikey'}
+
+archive_lock = threading.Lock()
+archive_state = {'connection': None, 'path': None, 'cursors': {}}
+
+class ReplayedResponse:
+    """Minimal stand-in for requests.Response built from an archived response."""
+
+    def __init__(self, url, status_code, content, latency):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.elapsed = datetime.timedelta(seconds=latency)
+        self.headers = requests.structures.CaseInsensitiveDict({'Content-Type': 'application/json'})
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        """Raises requests.HTTPError for a 4xx or 5xx archived status, like requests.Response does."""
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+def configure(mode='live', archive_path=None, reproduce_latency=False):
+    """
+    Selects the transport used by the api functions.
+
+    :param mode: 'live', 'record' or 'replay'.
+    :param archive_path: Path of the archive written in record mode and read in replay mode.
+    :param reproduce_latency: In replay mode, sleep for the latency observed when the response was recorded.
+    """
+    check_mode(mode)
+    with archive_lock:
+        if archive_state['connection'] is not None:
+            archive_state['connection'].close()
+        archive_state.update({'connection': None, 'path': None, 'cursors': {}})
+    settings['mode'] = mode
+    if archive_path is not None:
+        settings['archive_path'] = archive_path
+    settings['reproduce_latency'] = reproduce_latency
+
+def request_key(url, params):
+    """Returns the archive key of a request: a digest of its URL and its parameters without the API key."""
+    kept = {name: value for name, value in params.items() if name not in IGNORED_PARAMS and value is not None}
+    canonical = json.dumps([url, sorted((name, str(value)) for name, value in kept.items())])
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest(), kept
+
+def open_archive():
+    """Opens the archive of the current settings, creating its table and index on first use."""
+    path = settings['archive_path']
+    if archive_state['connection'] is None or archive_state['path'] != path:
+        if settings['mode'] == 'replay' and not os.path.exists(path):
+            raise FileNotFoundError(f"No Etherscan archive at {path}")
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "id INTEGER PRIMARY KEY, key TEXT NOT NULL, url TEXT NOT NULL, params TEXT NOT NULL, "
+            "status_code INTEGER NOT NULL, latency REAL NOT NULL, recorded_at REAL NOT NULL, body BLOB NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS responses_key ON responses (key, id)")
+        connection.commit()
+        archive_state.update({'connection': connection, 'path': path, 'cursors': {}})
+    return archive_state['connection']
+
+def record(url, params):
+    """Performs a live request and appends it, zlib-compressed, to the archive."""
+    started = time.perf_counter()
+    response = requests.get(url, params=params)
+    latency = time.perf_counter() - started
+    key, kept = request_key(url, params)
+    with archive_lock:
+        connection = open_archive()
+        connection.execute(
+            "INSERT INTO responses (key, url, params, status_code, latency, recorded_at, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, url, json.dumps(kept, sort_keys=True), response.status_code, latency, time.time(),
+             zlib.compress(response.content))
+        )
+        connection.commit()
+    return response
+
+def replay(url, params):
+    """
+    Serves a request from the archive.
+
+    A request recorded several times is answered with its recordings in order, the last one being
+    repeated once they are exhausted, so that polling loops replay the way they ran.
+    """
+    key, kept = request_key(url, params)
+    with archive_lock:
+        connection = open_archive()
+        position = archive_state['cursors'].get(key, 0)
+        row = connection.execute(
+            "SELECT status_code, latency, body FROM responses WHERE key = ? ORDER BY id LIMIT 1 OFFSET ?",
+            (key, position)
+        ).fetchone()
+        if row is None and position > 0:
+            row = connection.execute(
+                "SELECT status_code, latency, body FROM responses WHERE key = ? ORDER BY id DESC LIMIT 1",
+                (key,)
+            ).fetchone()
+        else:
+            archive_state['cursors'][key] = position + 1
+    if row is None:
+        raise LookupError(f"No archived response for {url} with {kept}")
+    status_code, latency, body = row
+    if settings['reproduce_latency']:
+        time.sleep(latency)
+    return ReplayedResponse(url, status_code, zlib.decompress(body), latency)
+
+def get(url, params):
+    """
+    Sends a GET request through the configured transport.
+
+    :param url: Request URL.
+    :param params: Dictionary of query parameters.
+    :return: requests.Response in live and record mode, ReplayedResponse in replay mode.
+    """
+    mode = settings['mode']
+    if mode == 'replay':
+        return replay(url, params)
+    if mode == 'record':
+        return record(url, params)
+    return requests.get(url, params=params)
@@ -0,0 +1 @@
+# Lets pytest import the api package and the top-level modules from the repository root
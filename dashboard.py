@@ -1,3 +1,6 @@
+import numpy as np
+
+from api.addresses import AddressTable
 from api.accounts import get_account_balance
 from api.accounts import get_multiple_address_balances
 
@@ -9,32 +12,41 @@ def display_account_balance(address):
     balance_info = get_account_balance(address)
     print("Account Balance:", balance_info['result'])
 
-def display_token_holders(token_address):
+def display_token_holders(token_address, address_table):
+    """
+    Fetches the holders of a token, keeping each holder address as its id in address_table.
+
+    :param token_address: Contract address of the ERC-20 token.
+    :param address_table: AddressTable scoped to the current dashboard run.
+    :return: List of holder dictionaries with AddressId and TokenHolderQuantity.
+    """
     token_holders = get_token_holder_list(token_address)
     token_holders_list = [
-        {"TokenHolderAddress": item["TokenHolderAddress"], "TokenHolderQuantity": item["TokenHolderQuantity"]}
+        {"AddressId": address_table.intern(item["TokenHolderAddress"]), "TokenHolderQuantity": item["TokenHolderQuantity"]}
         for item in token_holders["result"]
     ]
     return token_holders_list
 
-def enrich_token_holders_with_balances(token_holders_list):
-    addresses = [holder['TokenHolderAddress'] for holder in token_holders_list]
+def enrich_token_holders_with_balances(token_holders_list, address_table):
+    addresses = [address_table.address(holder['AddressId']) for holder in token_holders_list]
     balances_info = get_multiple_address_balances(addresses)
     
-    address_to_balance = {item['account']: item['balance'] for item in balances_info['result']}
+    # Key balances on interned ids so the join does not depend on how balancemulti cases addresses
+    # lookup rather than intern: accounts matching no holder must not grow the per-run table
+    address_to_balance = {address_table.lookup(item['account']): item['balance'] for item in balances_info['result']}
     
     for holder in token_holders_list:
-        holder['EtherBalance'] = address_to_balance.get(holder['TokenHolderAddress'], '0')
+        holder['EtherBalance'] = address_to_balance.get(holder['AddressId'], '0')
 
     return token_holders_list
 
-def enrich_token_holders_with_tokens_and_balances(enriched_list):
+def enrich_token_holders_with_tokens_and_balances(enriched_list, address_table):
     for holder in enriched_list:
         # Fetch the detailed ERC-20 tokens held by each address
-        token_data = get_address_erc20_token_holdings(holder['TokenHolderAddress'])
+        token_data = get_address_erc20_token_holdings(address_table.address(holder['AddressId']))
         holder['ERC20Tokens'] = [
             {
-                'TokenAddress': token['TokenAddress'],
+                'TokenAddressId': address_table.intern(token['TokenAddress']),
                 'TokenName': token['TokenName'],
                 'TokenSymbol': token['TokenSymbol'],
                 'TokenQuantity': token['TokenQuantity'],
@@ -43,24 +55,40 @@ def enrich_token_holders_with_tokens_and_balances(enriched_list):
         ]
     return enriched_list
 
-def enrich_erc20_token_balances(token_holders_list):
+def enrich_erc20_token_balances(token_holders_list, address_table):
     for holder in token_holders_list:
+        holder_address = address_table.address(holder['AddressId'])
         for token in holder['ERC20Tokens']:
-            balance = get_erc20_token_balance(token['TokenAddress'], holder['TokenHolderAddress'])
+            balance = get_erc20_token_balance(address_table.address(token['TokenAddressId']), holder_address)
             token['TokenBalance'] = balance['result']
     return token_holders_list
 
-def generate_token_balance_matrix(token_holders_list):
-    # Extract all unique token addresses
-    token_addresses = set()
-    for holder in token_holders_list:
-        tokens = holder.get('ERC20Tokens', [])
-        for token in tokens:
-            token_addresses.add(token['TokenAddress'])
+def generate_token_balance_matrix(token_holders_list, address_table):
+    """
+    Builds the holder x token balance matrix.
+
+    Holders are walked once to collect flat row, token id and balance lists; balances are then converted
+    in a single pass and scattered into the matrix with one vectorized assignment. Tokens are joined on
+    their interned ids, so differently cased spellings of a token share one column.
+
+    :param token_holders_list: Holder list enriched by enrich_erc20_token_balances.
+    :param address_table: AddressTable the holder list was built with.
+    :return: Tuple of the balance matrix and the sorted list of lower case token addresses.
+    """
+    # Flatten every (holder, token) entry into parallel lists
+    rows = []
+    token_ids = []
+    balances = []
+    for i, holder in enumerate(token_holders_list):
+        for token in holder.get('ERC20Tokens', []):
+            rows.append(i)
+            token_ids.append(token['TokenAddressId'])
+            balances.append(token['TokenBalance'])
 
     # Sort addresses and tokens to maintain a consistent order
-    token_addresses = sorted(token_addresses)
-    address_index = {addr: idx for idx, addr in enumerate(token_addresses)}
+    unique_ids = sorted(set(token_ids), key=address_table.key)
+    token_addresses = [address_table.address(token_id) for token_id in unique_ids]
+    address_index = {token_id: idx for idx, token_id in enumerate(unique_ids)}
 
     # Initialize the matrix
     num_holders = len(token_holders_list)
@@ -68,22 +96,22 @@ def generate_token_balance_matrix(token_holders_list):
     balance_matrix = np.zeros((num_holders, num_tokens))
 
     # Fill the matrix with balances
-    for i, holder in enumerate(token_holders_list):
-        for token in holder.get('ERC20Tokens', []):
-            token_idx = address_index.get(token['TokenAddress'])
-            if token_idx is not None:
-                balance_matrix[i, token_idx] = float(token['TokenBalance'])
+    count = len(rows)
+    columns = np.fromiter(map(address_index.__getitem__, token_ids), dtype=np.intp, count=count)
+    values = np.fromiter(map(float, balances), dtype=np.float64, count=count)
+    balance_matrix[np.array(rows, dtype=np.intp), columns] = values
 
     return balance_matrix, token_addresses
 
 if __name__ == "__main__":
     test_address = "0xaaaebe6fe48e54f431b0c390cfaf0b017d09d42d"
-    token_holder_list = display_token_holders(test_address)
-    token_holder_list_with_balances = enrich_token_holders_with_balances(token_holder_list)
-    token_holder_list_with_tokens = enrich_token_holders_with_tokens_and_balances(token_holder_list_with_balances)
-    final_token_holder_list = enrich_erc20_token_balances(token_holder_list_with_tokens)
+    address_table = AddressTable()
+    token_holder_list = display_token_holders(test_address, address_table)
+    token_holder_list_with_balances = enrich_token_holders_with_balances(token_holder_list, address_table)
+    token_holder_list_with_tokens = enrich_token_holders_with_tokens_and_balances(token_holder_list_with_balances, address_table)
+    final_token_holder_list = enrich_erc20_token_balances(token_holder_list_with_tokens, address_table)
 
-    balance_matrix, token_addresses = generate_token_balance_matrix(final_token_holder_list)
+    balance_matrix, token_addresses = generate_token_balance_matrix(final_token_holder_list, address_table)
 
     print("Token Balance Matrix:\n", balance_matrix)
     print("Token Addresses:", token_addresses)
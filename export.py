@@ -0,0 +1,250 @@
+import csv
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from api.accounts import get_erc20_token_transfers
+from api.accounts import get_beacon_chain_withdrawals
+from api.logs import get_event_logs_by_address
+from api.pagination import iterate_block_range
+
+# Column layouts of the exported endpoints. Block numbers, timestamps and gas figures are stored as
+# 64-bit integers; token amounts stay strings because uint256 values do not fit any Arrow integer type.
+# Fields missing from a record, such as methodId on older Etherscan responses, are exported as nulls.
+ERC20_TRANSFER_COLUMNS = [
+    ('blockNumber', 'int'),
+    ('timeStamp', 'int'),
+    ('hash', 'str'),
+    ('nonce', 'int'),
+    ('blockHash', 'str'),
+    ('from', 'str'),
+    ('contractAddress', 'str'),
+    ('to', 'str'),
+    ('value', 'str'),
+    ('tokenName', 'str'),
+    ('tokenSymbol', 'str'),
+    ('tokenDecimal', 'int'),
+    ('transactionIndex', 'int'),
+    ('gas', 'int'),
+    ('gasPrice', 'int'),
+    ('gasUsed', 'int'),
+    ('cumulativeGasUsed', 'int'),
+    ('input', 'str'),
+    ('methodId', 'str'),
+    ('functionName', 'str'),
+    ('confirmations', 'int'),
+]
+
+EVENT_LOG_COLUMNS = [
+    ('address', 'str'),
+    ('topics', 'list'),
+    ('data', 'str'),
+    ('blockNumber', 'int'),
+    ('blockHash', 'str'),
+    ('timeStamp', 'int'),
+    ('gasPrice', 'int'),
+    ('gasUsed', 'int'),
+    ('logIndex', 'int'),
+    ('transactionHash', 'str'),
+    ('transactionIndex', 'int'),
+]
+
+BEACON_WITHDRAWAL_COLUMNS = [
+    ('withdrawalIndex', 'int'),
+    ('validatorIndex', 'int'),
+    ('address', 'str'),
+    ('amount', 'int'),
+    ('blockNumber', 'int'),
+    ('timestamp', 'int'),
+]
+
+FILE_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow', 'csv': 'csv'}
+
+CHECKPOINT_FILE = '_checkpoint.json'
+
+def parse_int(value):
+    """Parse an Etherscan numeric field, which is either a decimal or a 0x-prefixed hex string."""
+    if value is None or value == '' or value == '0x':
+        return None
+    if isinstance(value, int):
+        return value
+    if value.startswith('0x'):
+        return int(value, 16)
+    return int(value)
+
+def records_to_columns(records, columns):
+    """
+    Converts a page of Etherscan records into typed column lists.
+
+    :param records: List of record dictionaries as returned in the 'result' field.
+    :param columns: List of (name, type) tuples, type being 'int', 'str' or 'list'.
+    :return: Dictionary mapping each column name to the list of its converted values.
+    """
+    converted = {}
+    for name, kind in columns:
+        values = [record.get(name) for record in records]
+        if kind == 'int':
+            values = [parse_int(value) for value in values]
+        elif kind == 'list':
+            values = [list(value) if value is not None else None for value in values]
+        converted[name] = values
+    return converted
+
+def arrow_schema(columns):
+    """Builds the pyarrow schema matching a column layout."""
+    types = {'int': pa.int64(), 'str': pa.string(), 'list': pa.list_(pa.string())}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+def write_batch(path, records, columns, fmt):
+    """
+    Writes one page of records to a standalone file in the requested format.
+
+    :param path: Destination file path.
+    :param records: List of record dictionaries.
+    :param columns: Column layout of the records.
+    :param fmt: Output format, one of 'parquet', 'arrow' or 'csv'.
+    """
+    data = records_to_columns(records, columns)
+    if fmt == 'csv':
+        names = [name for name, _ in columns]
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(names)
+            for row in zip(*(data[name] for name in names)):
+                writer.writerow(['|'.join(value) if isinstance(value, list) else value for value in row])
+        return
+
+    schema = arrow_schema(columns)
+    table = pa.Table.from_pydict(data, schema=schema)
+    if fmt == 'parquet':
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                writer.write_table(table)
+
+def load_checkpoint(directory, request):
+    """
+    Reads the export checkpoint of a directory, checking that it belongs to the same request.
+
+    :param directory: Export directory.
+    :param request: Dictionary describing the export (endpoint, arguments, start block and format).
+    :return: Checkpoint dictionary, or a fresh one if the export has not started yet.
+    """
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {'request': request, 'block': request['start_block'], 'skip': 0, 'records': 0, 'parts': []}
+    with open(path) as handle:
+        checkpoint = json.load(handle)
+    if checkpoint['request'] != request:
+        raise ValueError(f"{directory} already holds an export of a different request: {checkpoint['request']}")
+    return checkpoint
+
+def save_checkpoint(directory, checkpoint):
+    """Atomically replaces the export checkpoint of a directory."""
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    with open(path + '.tmp', 'w') as handle:
+        json.dump(checkpoint, handle)
+    os.replace(path + '.tmp', path)
+
+def export_pages(fetch_page, directory, columns, fmt='parquet', offset=1000, block_param='startblock', **kwargs):
+    """
+    Streams every record of a block-ordered endpoint to disk, one columnar file per fetched page.
+
+    Each page is written to a part file as soon as it is fetched, so memory use is bounded by a single
+    page. Part files are written under a temporary name and renamed once complete, and the checkpoint is
+    only advanced afterwards. The checkpoint holds a block cursor rather than a page number, so the export
+    goes past the Etherscan result window, and calling the function again on the same directory resumes
+    after the last completed part.
+
+    :param fetch_page: Paginated api function returning records in ascending block order.
+    :param directory: Directory receiving the part files and the checkpoint.
+    :param columns: Column layout of the records, e.g. ERC20_TRANSFER_COLUMNS.
+    :param fmt: Output format, one of 'parquet', 'arrow' or 'csv'.
+    :param offset: Number of records fetched and written per part file.
+    :param block_param: Name of the starting block argument of fetch_page, 'startblock' or 'fromBlock'.
+    :param kwargs: Arguments forwarded to fetch_page (address, startblock, ...).
+    :return: Checkpoint dictionary listing the part files and the number of records exported.
+    """
+    if fmt not in FILE_EXTENSIONS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt != 'csv' and pa is None:
+        raise ImportError(f"pyarrow is required to export to {fmt}")
+
+    os.makedirs(directory, exist_ok=True)
+    start_block = kwargs.pop(block_param, 0)
+    request = {'endpoint': fetch_page.__name__, 'format': fmt, 'offset': offset, 'block_param': block_param,
+               'start_block': start_block, 'arguments': kwargs}
+    checkpoint = load_checkpoint(directory, request)
+    if checkpoint.get('complete'):
+        return checkpoint
+
+    for records, (block, skip) in iterate_block_range(fetch_page, block_param, checkpoint['block'],
+                                                      checkpoint['skip'], offset, **kwargs):
+        part = f"part-{len(checkpoint['parts']) + 1:06d}.{FILE_EXTENSIONS[fmt]}"
+        path = os.path.join(directory, part)
+        write_batch(path + '.tmp', records, columns, fmt)
+        os.replace(path + '.tmp', path)
+
+        checkpoint['block'] = block
+        checkpoint['skip'] = skip
+        checkpoint['records'] += len(records)
+        checkpoint['parts'].append(part)
+        save_checkpoint(directory, checkpoint)
+
+    checkpoint['complete'] = True
+    save_checkpoint(directory, checkpoint)
+    return checkpoint
+
+def export_erc20_token_transfers(address, directory, fmt='parquet', offset=1000, **kwargs):
+    """
+    Exports the full ERC-20 transfer history of an address.
+
+    :param address: Ethereum address as a string.
+    :param directory: Directory receiving the part files.
+    :param fmt: Output format, one of 'parquet', 'arrow' or 'csv'.
+    :param offset: Number of transfers per part file.
+    :return: Checkpoint dictionary of the export.
+    """
+    kwargs['sort'] = 'asc'
+    return export_pages(get_erc20_token_transfers, directory, ERC20_TRANSFER_COLUMNS, fmt, offset,
+                        address=address, **kwargs)
+
+def export_event_logs(address, fromBlock, toBlock, directory, fmt='parquet', offset=1000):
+    """
+    Exports the event logs emitted by an address within a block range.
+
+    :param address: Ethereum address as a string.
+    :param fromBlock: Starting block number for the log search.
+    :param toBlock: Ending block number for the log search.
+    :param directory: Directory receiving the part files.
+    :param fmt: Output format, one of 'parquet', 'arrow' or 'csv'.
+    :param offset: Number of logs per part file.
+    :return: Checkpoint dictionary of the export.
+    """
+    return export_pages(get_event_logs_by_address, directory, EVENT_LOG_COLUMNS, fmt, offset, 'fromBlock',
+                        address=address, fromBlock=fromBlock, toBlock=toBlock)
+
+def export_beacon_chain_withdrawals(address, directory, fmt='parquet', offset=1000, **kwargs):
+    """
+    Exports the beacon chain withdrawals made to an address.
+
+    :param address: Ethereum address as a string.
+    :param directory: Directory receiving the part files.
+    :param fmt: Output format, one of 'parquet', 'arrow' or 'csv'.
+    :param offset: Number of withdrawals per part file.
+    :return: Checkpoint dictionary of the export.
+    """
+    kwargs['sort'] = 'asc'
+    return export_pages(get_beacon_chain_withdrawals, directory, BEACON_WITHDRAWAL_COLUMNS, fmt, offset,
+                        address=address, **kwargs)
+
+if __name__ == "__main__":
+    checkpoint = export_erc20_token_transfers("0x4e83362442b8d1bec281594cea3050c8eb01311c", "exports/erc20_transfers")
+    print("Exported", checkpoint['records'], "transfers into", len(checkpoint['parts']), "files")
@@ -0,0 +1,34 @@
+import pytest
+
+from api.pagination import MAX_RESULT_WINDOW
+
+@pytest.fixture
+def paged_endpoint():
+    """
+    Factory of paginated Etherscan endpoint stubs.
+
+    make(records, fail_on_call=None) returns (endpoint, calls). The endpoint serves records in the given
+    order, keeping only those at or after startblock when that argument is passed, refuses pages beyond
+    the result window like Etherscan, and raises ConnectionError on call number fail_on_call. calls
+    collects the keyword arguments of every call.
+    """
+    def make(records, fail_on_call=None):
+        calls = []
+
+        def endpoint(page, offset, **kwargs):
+            calls.append(dict(kwargs, page=page, offset=offset))
+            if fail_on_call is not None and len(calls) == fail_on_call:
+                raise ConnectionError("network down")
+            if page * offset > MAX_RESULT_WINDOW:
+                return {'status': '0', 'message': 'NOTOK', 'result': 'Result window is too large'}
+            matching = records
+            if 'startblock' in kwargs:
+                matching = [record for record in records if int(record['blockNumber']) >= kwargs['startblock']]
+            result = matching[(page - 1) * offset:page * offset]
+            if not result:
+                return {'status': '0', 'message': 'No transactions found', 'result': []}
+            return {'status': '1', 'message': 'OK', 'result': result}
+
+        return endpoint, calls
+
+    return make
@@ -0,0 +1,18 @@
+import pytest
+
+from api.addresses import AddressTable
+from api.addresses import normalize_address
+
+def test_spellings_of_an_address_share_one_id():
+    table = AddressTable()
+    first = table.intern('0xDDBD2B932C763BA5B1B7AE3B362EAC3E8D40121A')
+
+    assert table.intern('0xddbd2b932c763ba5b1b7ae3b362eac3e8d40121a') == first
+    assert table.address(first) == '0xddbd2b932c763ba5b1b7ae3b362eac3e8d40121a'
+    assert len(table) == 1
+
+@pytest.mark.parametrize('address', ['ab' * 19 + '  ', '0x' + 'zz' * 20, '0x1234'])
+def test_malformed_addresses_are_rejected(address):
+    with pytest.raises(ValueError):
+        normalize_address(address)
+    assert address not in AddressTable()
@@ -0,0 +1,42 @@
+import numpy as np
+
+import dashboard
+from api.addresses import AddressTable
+
+TOKEN_A = '0x6b175474e89094c44da98b954eedeac495271d0f'
+TOKEN_B = '0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48'
+
+def test_balance_matrix_joins_token_spellings_and_leaves_missing_tokens_at_zero():
+    address_table = AddressTable()
+    holders = [
+        {'ERC20Tokens': [
+            {'TokenAddressId': address_table.intern(TOKEN_B), 'TokenBalance': '250'},
+            {'TokenAddressId': address_table.intern(TOKEN_A), 'TokenBalance': '1.5'},
+        ]},
+        {'ERC20Tokens': [{'TokenAddressId': address_table.intern(TOKEN_A.upper().replace('0X', '0x')), 'TokenBalance': '7'}]},
+        {},
+    ]
+
+    balance_matrix, token_addresses = dashboard.generate_token_balance_matrix(holders, address_table)
+
+    assert token_addresses == [TOKEN_A, TOKEN_B]
+    np.testing.assert_array_equal(balance_matrix, [[1.5, 250.0], [7.0, 0.0], [0.0, 0.0]])
+
+def test_ether_balances_join_on_addresses_whatever_their_casing(monkeypatch):
+    address_table = AddressTable()
+    checksummed = '0xDDbD2B932c763bA5b1b7AE3B362eac3e8d40121A'
+    lower = '0x63a9975ba31b0b9626b34300f7f627147df1f526'
+    holders = [{'AddressId': address_table.intern(checksummed.lower()), 'TokenHolderQuantity': '1'},
+               {'AddressId': address_table.intern(lower), 'TokenHolderQuantity': '2'}]
+    replies = {'result': [
+        {'account': checksummed, 'balance': '40'},
+        {'account': lower.upper().replace('0X', '0x'), 'balance': '2'},
+        {'account': '0x198ef1ec325a96cc354c7266a038be8b5c558f67', 'balance': '99'},
+    ]}
+    monkeypatch.setattr(dashboard, 'get_multiple_address_balances', lambda addresses: replies)
+
+    enriched = dashboard.enrich_token_holders_with_balances(holders, address_table)
+
+    assert [holder['EtherBalance'] for holder in enriched] == ['40', '2']
+    # The account matching no holder is not added to the table
+    assert len(address_table) == 2
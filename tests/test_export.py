@@ -0,0 +1,89 @@
+import csv
+import os
+
+import pytest
+
+from api.pagination import iterate_block_range
+from export import BEACON_WITHDRAWAL_COLUMNS
+from export import ERC20_TRANSFER_COLUMNS
+from export import EVENT_LOG_COLUMNS
+from export import export_pages
+from export import write_batch
+
+def withdrawals(count, per_block):
+    return [
+        {'withdrawalIndex': str(i), 'validatorIndex': '7', 'address': '0xab', 'amount': '100',
+         'blockNumber': str(17000000 + i // per_block), 'timestamp': str(1700000000 + i)}
+        for i in range(count)
+    ]
+
+def exported_indexes(directory, checkpoint):
+    indexes = []
+    for part in checkpoint['parts']:
+        with open(os.path.join(directory, part), newline='') as handle:
+            indexes.extend(int(row['withdrawalIndex']) for row in csv.DictReader(handle))
+    return indexes
+
+def test_export_goes_past_the_result_window_without_duplicates(tmp_path, paged_endpoint):
+    records = withdrawals(25000, per_block=7)
+    endpoint, _ = paged_endpoint(records)
+
+    checkpoint = export_pages(endpoint, str(tmp_path), BEACON_WITHDRAWAL_COLUMNS, 'csv', 3000, address='0xab')
+
+    assert checkpoint['complete']
+    assert checkpoint['records'] == 25000
+    assert exported_indexes(str(tmp_path), checkpoint) == list(range(25000))
+
+def test_export_resumes_after_the_last_completed_part(tmp_path, paged_endpoint):
+    records = withdrawals(12000, per_block=5)
+    endpoint, _ = paged_endpoint(records, fail_on_call=4)
+    with pytest.raises(ConnectionError):
+        export_pages(endpoint, str(tmp_path), BEACON_WITHDRAWAL_COLUMNS, 'csv', 1000, address='0xab')
+
+    endpoint, calls = paged_endpoint(records)
+    checkpoint = export_pages(endpoint, str(tmp_path), BEACON_WITHDRAWAL_COLUMNS, 'csv', 1000, address='0xab')
+
+    # The three parts written before the failure are kept, the crawl restarts from the block cursor
+    assert (calls[0]['startblock'], calls[0]['page']) == (17000000 + 3000 // 5 - 1, 1)
+    assert exported_indexes(str(tmp_path), checkpoint) == list(range(12000))
+
+def test_export_refuses_a_directory_of_another_request(tmp_path, paged_endpoint):
+    endpoint, _ = paged_endpoint(withdrawals(10, per_block=1))
+    export_pages(endpoint, str(tmp_path), BEACON_WITHDRAWAL_COLUMNS, 'csv', 100, address='0xab')
+
+    with pytest.raises(ValueError):
+        export_pages(endpoint, str(tmp_path), BEACON_WITHDRAWAL_COLUMNS, 'csv', 100, address='0xcd')
+
+@pytest.mark.parametrize('start_block, count, per_block', [(17000000, 1000, 1000), (17000000, 2000, 1000)])
+def test_crawl_ending_on_a_full_page_does_not_restart(start_block, count, per_block, paged_endpoint):
+    endpoint, calls = paged_endpoint(withdrawals(count, per_block))
+
+    records = [record for batch, _ in iterate_block_range(endpoint, 'startblock', start_block, 0, 1000, address='0xab')
+               for record in batch]
+
+    assert [int(record['withdrawalIndex']) for record in records] == list(range(count))
+    assert [(call['startblock'], call['page']) for call in calls] == [(start_block, page) for page in range(1, count // 1000 + 2)]
+
+def test_parquet_batches_keep_typed_columns(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    logs = [{'address': '0xab', 'topics': ['0xdd', '0x01'], 'data': '0x', 'blockNumber': '0x10', 'timeStamp': '0x65',
+             'gasPrice': '0x1', 'gasUsed': '0x2', 'logIndex': '0x', 'transactionHash': '0xff', 'transactionIndex': '0x3'}]
+    transfers = [{'blockNumber': '17000000', 'timeStamp': '1700000000', 'value': str(2**255), 'tokenDecimal': '18'}]
+    write_batch(str(tmp_path / 'logs.parquet'), logs, EVENT_LOG_COLUMNS, 'parquet')
+    write_batch(str(tmp_path / 'transfers.parquet'), transfers, ERC20_TRANSFER_COLUMNS, 'parquet')
+
+    log_table = pq.read_table(str(tmp_path / 'logs.parquet'))
+    assert log_table.schema.field('blockNumber').type == pa.int64()
+    assert log_table.schema.field('timeStamp').type == pa.int64()
+    assert log_table.schema.field('topics').type == pa.list_(pa.string())
+    assert log_table.to_pylist()[0]['topics'] == ['0xdd', '0x01']
+    assert log_table.to_pylist()[0]['blockNumber'] == 16
+    assert log_table.to_pylist()[0]['logIndex'] is None
+
+    transfer_table = pq.read_table(str(tmp_path / 'transfers.parquet'))
+    assert transfer_table.schema.field('value').type == pa.string()
+    assert transfer_table.to_pylist()[0]['value'] == str(2**255)
+    assert transfer_table.to_pylist()[0]['methodId'] is None
@@ -0,0 +1,79 @@
+import datetime
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import requests
+
+from api import transport
+
+class RecordedResponse:
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    path = str(tmp_path / 'archive.sqlite')
+    answers = iter([RecordedResponse({'result': '1'}), RecordedResponse({'result': '2'}),
+                    RecordedResponse({'result': 'gone'}, status_code=503)])
+    monkeypatch.setattr(requests, 'get', lambda url, params: next(answers))
+    transport.configure('record', path)
+    transport.get('https://api.etherscan.io/api', {'module': 'account', 'address': '0xab', 'apikey': 'one'})
+    transport.get('https://api.etherscan.io/api', {'module': 'account', 'address': '0xab', 'apikey': 'one'})
+    transport.get('https://api.etherscan.io/api', {'module': 'account', 'address': '0xcd', 'apikey': 'one'})
+
+    def fail(url, params):
+        raise AssertionError("replay must not reach the network")
+    monkeypatch.setattr(requests, 'get', fail)
+    transport.configure('replay', path)
+    yield path
+    transport.configure('live')
+
+def test_replay_serves_recordings_in_order_then_repeats_the_last(archive):
+    params = {'module': 'account', 'address': '0xab', 'apikey': 'another key'}
+    results = [transport.get('https://api.etherscan.io/api', params).json()['result'] for _ in range(4)]
+
+    assert results == ['1', '2', '2', '2']
+
+def test_replay_restarts_from_the_first_recording_after_configure(archive):
+    params = {'module': 'account', 'address': '0xab'}
+    transport.get('https://api.etherscan.io/api', params)
+    transport.configure('replay', archive)
+
+    assert transport.get('https://api.etherscan.io/api', params).json()['result'] == '1'
+
+def test_replayed_response_behaves_like_requests_response(archive):
+    response = transport.get('https://api.etherscan.io/api', {'module': 'account', 'address': '0xab'})
+    failed = transport.get('https://api.etherscan.io/api', {'module': 'account', 'address': '0xcd'})
+
+    assert response.ok
+    assert isinstance(response.elapsed, datetime.timedelta)
+    response.raise_for_status()
+    assert not failed.ok
+    with pytest.raises(requests.HTTPError):
+        failed.raise_for_status()
+
+def test_replay_raises_for_unrecorded_requests(archive):
+    with pytest.raises(LookupError):
+        transport.get('https://api.etherscan.io/api', {'module': 'account', 'address': '0xef'})
+
+@pytest.mark.parametrize('mode', ['Replay', 'offline', ''])
+def test_unknown_transport_mode_in_the_environment_is_refused(mode):
+    environment = dict(os.environ, ETHERSCAN_TRANSPORT=mode)
+    completed = subprocess.run([sys.executable, '-c', 'import api.transport'], env=environment,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               capture_output=True, text=True)
+
+    assert completed.returncode != 0
+    assert 'Unknown transport mode' in completed.stderr
+
+def test_configure_refuses_unknown_modes():
+    with pytest.raises(ValueError):
+        transport.configure('Replay')
+    assert transport.settings['mode'] == 'live'
@@ -0,0 +1,106 @@
+import pytest
+
+import validators
+from api.addresses import normalize_address
+from api.pagination import RateLimiter
+from api.pagination import rate_limited
+
+ADDRESS = '0xb9d7934878b5fb9610b3fe8a5e441e8fad7e293f'
+OTHER_ADDRESS = '0x388c818ca8b9251b393131c08a736a67ccb19297'
+DAY = 1700000000 // 86400 * 86400
+
+@pytest.fixture
+def store():
+    connection = validators.open_income_store(':memory:')
+    yield connection
+    connection.close()
+
+def mined_blocks(numbers):
+    """getminedblocks records for the given block numbers, newest first."""
+    return [
+        {'blockNumber': str(number), 'timeStamp': str(DAY + number % 1000), 'blockReward': str(3 * 10**9)}
+        for number in sorted(numbers, reverse=True)
+    ]
+
+def test_store_crawl_skips_stored_events_and_advances_the_cursor(store):
+    key = normalize_address(ADDRESS)
+    validators.store_crawl(store, key, 'withdrawals', [(1, 100, DAY, 10), (2, 105, DAY, 20)])
+    # A restarted crawl sees the last block again together with a new withdrawal
+    validators.store_crawl(store, key, 'withdrawals', [(2, 105, DAY, 20), (3, 107, DAY + 60, 5)])
+
+    report = validators.income_report(store, [ADDRESS])
+
+    assert [(row['WithdrawalsGwei'], row['WithdrawalCount']) for row in report] == [(35, 3)]
+    assert validators.crawl_cursor(store, key, 'withdrawals') == 107
+    assert validators.crawl_cursor(store, key, 'blocks') == 0
+
+def test_store_crawl_never_moves_the_cursor_back(store):
+    key = normalize_address(ADDRESS)
+    validators.store_crawl(store, key, 'blocks', [(200, DAY, 3)])
+    validators.store_crawl(store, key, 'blocks', [(150, DAY, 3)])
+
+    assert validators.crawl_cursor(store, key, 'blocks') == 200
+
+def test_mined_blocks_refresh_without_new_blocks_costs_one_small_request(paged_endpoint):
+    endpoint, calls = paged_endpoint(mined_blocks(range(1, 5001)))
+
+    assert validators.crawl_mined_blocks(ADDRESS, 5000, fetch_page=endpoint) == ([], False)
+    assert [(call['page'], call['offset']) for call in calls] == [(1, 10)]
+
+def test_mined_blocks_pages_grow_without_gaps_or_overlaps(paged_endpoint):
+    endpoint, calls = paged_endpoint(mined_blocks(range(1, 3001)))
+
+    rows, truncated = validators.crawl_mined_blocks(ADDRESS, 0, fetch_page=endpoint)
+
+    assert [row[0] for row in rows] == list(range(3000, 0, -1))
+    assert not truncated
+    assert [(call['page'], call['offset']) for call in calls][:4] == [(1, 10), (2, 10), (2, 20), (2, 40)]
+
+def test_mined_blocks_crawl_reaches_the_whole_window_and_reports_truncation(paged_endpoint):
+    endpoint, calls = paged_endpoint(mined_blocks(range(1, 20001)))
+
+    rows, truncated = validators.crawl_mined_blocks(ADDRESS, 5, fetch_page=endpoint)
+
+    assert [row[0] for row in rows] == list(range(20000, 10000, -1))
+    assert truncated
+    assert all(call['page'] * call['offset'] <= 10000 for call in calls)
+
+def test_truncated_refresh_records_a_gap_and_flags_the_report(store, paged_endpoint, monkeypatch):
+    blocks_endpoint, _ = paged_endpoint(mined_blocks(range(1, 10011)))
+    withdrawals_endpoint, _ = paged_endpoint([])
+    monkeypatch.setattr(validators, 'get_mined_blocks', blocks_endpoint)
+    monkeypatch.setattr(validators, 'get_beacon_chain_withdrawals', withdrawals_endpoint)
+
+    validators.refresh_income(store, [ADDRESS], calls_per_second=1000)
+
+    assert validators.crawl_gaps(store, [ADDRESS]) == [
+        {'Address': ADDRESS, 'Source': 'blocks', 'AfterBlock': 0, 'BeforeBlock': 11, 'BeforeTimestamp': DAY + 11}
+    ]
+    assert validators.crawl_gaps(store, [OTHER_ADDRESS]) == []
+    assert [row['Incomplete'] for row in validators.income_report(store, [ADDRESS])] == [True]
+    assert [row['Incomplete'] for row in validators.income_report(store, [OTHER_ADDRESS])] == []
+
+def test_rate_limited_retries_refusals():
+    replies = iter([{'status': '0', 'message': 'NOTOK', 'result': 'Max rate limit reached'},
+                    {'status': '1', 'message': 'OK', 'result': []}])
+    fetch = rate_limited(lambda **kwargs: next(replies), RateLimiter(1000), backoff=0)
+
+    assert fetch(page=1)['status'] == '1'
+
+def test_refresh_stores_finished_crawls_when_another_fails(store, paged_endpoint, monkeypatch):
+    def get_beacon_chain_withdrawals(address, startblock, page, offset, sort):
+        if address == OTHER_ADDRESS:
+            return {'status': '0', 'message': 'NOTOK', 'result': 'Invalid address format'}
+        return {'status': '1', 'message': 'OK', 'result': [
+            {'withdrawalIndex': '1', 'validatorIndex': '9', 'address': address, 'amount': '32',
+             'blockNumber': '100', 'timestamp': str(DAY)}
+        ]}
+    endpoint, _ = paged_endpoint([])
+    monkeypatch.setattr(validators, 'get_beacon_chain_withdrawals', get_beacon_chain_withdrawals)
+    monkeypatch.setattr(validators, 'get_mined_blocks', endpoint)
+
+    with pytest.raises(RuntimeError, match='1 crawls failed'):
+        validators.refresh_income(store, [ADDRESS, OTHER_ADDRESS], calls_per_second=1000)
+
+    assert validators.income_report(store, [ADDRESS])[0]['WithdrawalsGwei'] == 32
+    assert validators.crawl_cursor(store, normalize_address(ADDRESS), 'withdrawals') == 100
@@ -0,0 +1,369 @@
+import datetime
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+
+from api.accounts import get_beacon_chain_withdrawals
+from api.accounts import get_mined_blocks
+from api.addresses import normalize_address
+from api.pagination import MAX_RESULT_WINDOW
+from api.pagination import RateLimiter
+from api.pagination import iterate_block_range
+from api.pagination import page_result
+from api.pagination import rate_limited
+
+BEACON_GENESIS_TIME = 1606824023
+SECONDS_PER_EPOCH = 12 * 32
+SECONDS_PER_DAY = 86400
+
+# Etherscan allows 5 calls per second on the free plan
+DEFAULT_CALLS_PER_SECOND = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS withdrawals_seen (withdrawal_index INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS blocks_seen (block_number INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS crawl_cursors (
+    address BLOB NOT NULL, source TEXT NOT NULL, block_number INTEGER NOT NULL,
+    PRIMARY KEY (address, source)
+);
+CREATE TABLE IF NOT EXISTS crawl_gaps (
+    address BLOB NOT NULL, source TEXT NOT NULL, after_block INTEGER NOT NULL,
+    before_block INTEGER NOT NULL, before_timestamp INTEGER NOT NULL,
+    PRIMARY KEY (address, source, before_block)
+);
+CREATE TABLE IF NOT EXISTS daily_income (
+    address BLOB NOT NULL, day INTEGER NOT NULL,
+    withdrawals_gwei INTEGER NOT NULL DEFAULT 0, withdrawal_count INTEGER NOT NULL DEFAULT 0,
+    block_rewards_gwei INTEGER NOT NULL DEFAULT 0, block_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (address, day)
+);
+CREATE TABLE IF NOT EXISTS epoch_income (
+    address BLOB NOT NULL, epoch INTEGER NOT NULL,
+    withdrawals_gwei INTEGER NOT NULL DEFAULT 0, withdrawal_count INTEGER NOT NULL DEFAULT 0,
+    block_rewards_gwei INTEGER NOT NULL DEFAULT 0, block_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (address, epoch)
+);
+"""
+
+def open_income_store(path='validator_income.sqlite'):
+    """
+    Opens the local income store, creating its tables on first use.
+
+    :param path: Path of the SQLite database file.
+    :return: sqlite3 connection to the store.
+    """
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+def epoch_of(timestamp):
+    """Returns the beacon chain epoch of a Unix timestamp; blocks older than the beacon chain get negative epochs."""
+    return (timestamp - BEACON_GENESIS_TIME) // SECONDS_PER_EPOCH
+
+def crawl_withdrawals(address, startblock, offset=1000, fetch_page=get_beacon_chain_withdrawals):
+    """
+    Fetches the beacon chain withdrawals of an address from a block onwards.
+
+    When the results go beyond the Etherscan result window, the crawl restarts from the last block seen,
+    so histories of any length are fetched.
+
+    :param address: Ethereum address as a string.
+    :param startblock: First block to fetch withdrawals from.
+    :param offset: Number of withdrawals per page.
+    :param fetch_page: Function fetching a page of withdrawals, e.g. a rate_limited wrapper.
+    :return: List of (withdrawalIndex, blockNumber, timestamp, amount in gwei) tuples.
+    """
+    rows = []
+    for result, _ in iterate_block_range(fetch_page, 'startblock', startblock, 0, offset, address=address, sort='asc'):
+        rows.extend(
+            (int(item['withdrawalIndex']), int(item['blockNumber']), int(item['timestamp']), int(item['amount']))
+            for item in result
+        )
+    return rows
+
+def next_mined_blocks_page(fetched, max_offset):
+    """
+    Returns the (page, offset) pair fetching the blocks right after the first `fetched` ones.
+
+    The offset is the largest divisor of fetched that stays within max_offset and the result window, so
+    pages line up with the blocks already fetched and the last page ends exactly on MAX_RESULT_WINDOW.
+
+    :param fetched: Number of blocks fetched so far, from the newest one.
+    :param max_offset: Largest page size allowed.
+    :return: (page, offset) tuple, or None once the result window is used up.
+    """
+    remaining = MAX_RESULT_WINDOW - fetched
+    if remaining <= 0:
+        return None
+    offset = min(max_offset, fetched, remaining)
+    while fetched % offset:
+        offset -= 1
+    return fetched // offset + 1, offset
+
+def crawl_mined_blocks(address, after_block, first_offset=10, max_offset=1000, fetch_page=get_mined_blocks):
+    """
+    Fetches the blocks validated by an address that are more recent than a block.
+
+    Etherscan lists mined blocks newest first and has no block range filter, so pages are fetched until
+    one reaches a block already crawled. The first page is small so that a refresh with no new blocks
+    costs one short request; while no crawled block has been reached the page size grows with the number
+    of blocks fetched, up to max_offset, and the pages cover the whole result window. Only the most
+    recent 10000 blocks of an address are reachable: when the window is used up before after_block is
+    reached, the crawl is reported as truncated.
+
+    :param address: Ethereum address as a string.
+    :param after_block: Last block already crawled, 0 to fetch everything reachable.
+    :param first_offset: Number of blocks requested by the first page.
+    :param max_offset: Largest page size.
+    :param fetch_page: Function fetching a page of mined blocks, e.g. a rate_limited wrapper.
+    :return: Tuple of the list of (blockNumber, timeStamp, blockReward in gwei) tuples and a flag telling
+             whether older blocks newer than after_block could not be fetched.
+    """
+    rows = []
+    page, offset = 1, first_offset
+    while True:
+        result = page_result(fetch_page(address=address, blocktype='blocks', page=page, offset=offset), page)
+        if result is None:
+            return rows, False
+        for item in result:
+            block_number = int(item['blockNumber'])
+            if block_number <= after_block:
+                return rows, False
+            rows.append((block_number, int(item['timeStamp']), int(item['blockReward']) // 10**9))
+        if len(result) < offset:
+            return rows, False
+        next_page = next_mined_blocks_page(page * offset, max_offset)
+        if next_page is None:
+            return rows, True
+        page, offset = next_page
+
+def add_income(connection, address_key, totals):
+    """Adds per-period totals of one address to the daily and epoch aggregates."""
+    for table, column, period_totals in (('daily_income', 'day', totals['day']),
+                                         ('epoch_income', 'epoch', totals['epoch'])):
+        connection.executemany(
+            f"INSERT INTO {table} (address, {column}, withdrawals_gwei, withdrawal_count, block_rewards_gwei, block_count) "
+            f"VALUES (?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT (address, {column}) DO UPDATE SET "
+            f"withdrawals_gwei = withdrawals_gwei + excluded.withdrawals_gwei, "
+            f"withdrawal_count = withdrawal_count + excluded.withdrawal_count, "
+            f"block_rewards_gwei = block_rewards_gwei + excluded.block_rewards_gwei, "
+            f"block_count = block_count + excluded.block_count",
+            [(address_key, period, *values) for period, values in period_totals.items()]
+        )
+
+def accumulate(totals, timestamp, position, amount):
+    """Adds an amount to the day and epoch totals of a timestamp; position 0 is withdrawals, 2 block rewards."""
+    for period, value in (('day', timestamp // SECONDS_PER_DAY), ('epoch', epoch_of(timestamp))):
+        values = totals[period].setdefault(value, [0, 0, 0, 0])
+        values[position] += amount
+        values[position + 1] += 1
+
+def store_crawl(connection, address_key, source, rows):
+    """
+    Aggregates the newly crawled rows of one address and source, and advances its cursor.
+
+    Events already stored are skipped, so overlapping crawls never count income twice. Everything is
+    committed in a single transaction.
+
+    :param connection: Connection returned by open_income_store.
+    :param address_key: 20-byte key of the address.
+    :param source: 'withdrawals' or 'blocks'.
+    :param rows: Rows returned by crawl_withdrawals or crawl_mined_blocks.
+    """
+    totals = {'day': {}, 'epoch': {}}
+    last_block = None
+    with connection:
+        for row in rows:
+            if source == 'withdrawals':
+                withdrawal_index, block_number, timestamp, amount = row
+                cursor = connection.execute("INSERT OR IGNORE INTO withdrawals_seen VALUES (?)", (withdrawal_index,))
+                if cursor.rowcount:
+                    accumulate(totals, timestamp, 0, amount)
+            else:
+                block_number, timestamp, reward = row
+                cursor = connection.execute("INSERT OR IGNORE INTO blocks_seen VALUES (?)", (block_number,))
+                if cursor.rowcount:
+                    accumulate(totals, timestamp, 2, reward)
+            last_block = block_number if last_block is None else max(last_block, block_number)
+
+        add_income(connection, address_key, totals)
+        if last_block is not None:
+            connection.execute(
+                "INSERT INTO crawl_cursors VALUES (?, ?, ?) "
+                "ON CONFLICT (address, source) DO UPDATE SET block_number = MAX(block_number, excluded.block_number)",
+                (address_key, source, last_block)
+            )
+
+def store_gap(connection, address_key, source, after_block, rows):
+    """
+    Records that the blocks between after_block and the oldest crawled row could not be fetched.
+
+    :param connection: Connection returned by open_income_store.
+    :param address_key: 20-byte key of the address.
+    :param source: Crawled source, 'blocks'.
+    :param after_block: Last block crawled before this crawl.
+    :param rows: Rows returned by the truncated crawl, newest first.
+    """
+    before_block, before_timestamp = rows[-1][0], rows[-1][1]
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO crawl_gaps VALUES (?, ?, ?, ?, ?)",
+            (address_key, source, after_block, before_block, before_timestamp)
+        )
+
+def crawl_gaps(connection, addresses=None):
+    """
+    Lists the ranges of blocks that truncated crawls could not fetch.
+
+    :param connection: Connection returned by open_income_store.
+    :param addresses: Iterable of addresses to include, None for every address in the store.
+    :return: List of dictionaries with the address, source, the missing block range (exclusive bounds)
+             and the timestamp of the block right after the range.
+    """
+    rows = connection.execute(
+        "SELECT address, source, after_block, before_block, before_timestamp FROM crawl_gaps ORDER BY address, before_block"
+    ).fetchall()
+    keys = None if addresses is None else {normalize_address(address) for address in addresses}
+    return [
+        {'Address': '0x' + address.hex(), 'Source': source, 'AfterBlock': after_block,
+         'BeforeBlock': before_block, 'BeforeTimestamp': before_timestamp}
+        for address, source, after_block, before_block, before_timestamp in rows
+        if keys is None or address in keys
+    ]
+
+def crawl_cursor(connection, address_key, source):
+    """Returns the last block crawled for an address and source, or 0 if it was never crawled."""
+    row = connection.execute(
+        "SELECT block_number FROM crawl_cursors WHERE address = ? AND source = ?", (address_key, source)
+    ).fetchone()
+    return row[0] if row else 0
+
+def refresh_income(connection, addresses, workers=4, offset=1000, calls_per_second=DEFAULT_CALLS_PER_SECOND):
+    """
+    Fetches the withdrawals and mined blocks added since the last refresh for a set of addresses.
+
+    Both endpoints of every address are crawled concurrently in a thread pool. All crawls share one rate
+    limiter and retry with a backoff when Etherscan still refuses a call. Results are aggregated in the
+    calling thread as each crawl completes; a failed crawl does not discard the others, which are all
+    stored before the failures are reported, and the next refresh resumes from the stored cursors.
+
+    :param connection: Connection returned by open_income_store.
+    :param addresses: Iterable of validator fee recipient or withdrawal addresses.
+    :param workers: Number of concurrent crawls.
+    :param offset: Number of withdrawals per page.
+    :param calls_per_second: Etherscan calls allowed per second for the API key.
+    :return: Dictionary mapping (address, source) to the number of rows fetched. Mined block crawls cut
+             by the result window are recorded in the store, see crawl_gaps.
+    """
+    limiter = RateLimiter(calls_per_second)
+    fetch_withdrawals = rate_limited(get_beacon_chain_withdrawals, limiter)
+    fetch_mined_blocks = rate_limited(get_mined_blocks, limiter)
+
+    fetched = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for address in addresses:
+            address_key = normalize_address(address)
+            # Restart from the last withdrawal block itself: other withdrawals of that block are deduplicated
+            withdrawals_start = crawl_cursor(connection, address_key, 'withdrawals')
+            blocks_after = crawl_cursor(connection, address_key, 'blocks')
+            futures[pool.submit(crawl_withdrawals, address, withdrawals_start, offset,
+                                fetch_withdrawals)] = (address, address_key, 'withdrawals', withdrawals_start)
+            futures[pool.submit(crawl_mined_blocks, address, blocks_after,
+                                fetch_page=fetch_mined_blocks)] = (address, address_key, 'blocks', blocks_after)
+
+        for future in as_completed(futures):
+            address, address_key, source, cursor = futures[future]
+            try:
+                rows = future.result()
+            except Exception as error:
+                failures[(address, source)] = error
+                continue
+            truncated = False
+            if source == 'blocks':
+                rows, truncated = rows
+            store_crawl(connection, address_key, source, rows)
+            if truncated:
+                store_gap(connection, address_key, source, cursor, rows)
+            fetched[(address, source)] = len(rows)
+
+    if failures:
+        failed = ', '.join(f"{address} {source}" for address, source in failures)
+        raise RuntimeError(f"{len(failures)} crawls failed ({failed}); the other crawls were stored") \
+            from next(iter(failures.values()))
+    return fetched
+
+def income_report(connection, addresses=None, start=None, end=None, period='day'):
+    """
+    Reports the income of a set of addresses from the pre-aggregated totals.
+
+    :param connection: Connection returned by open_income_store.
+    :param addresses: Iterable of addresses to include, None for every address in the store.
+    :param start: First period to include: a datetime.date for days, an epoch number for epochs.
+    :param end: Last period to include, same type as start.
+    :param period: 'day' or 'epoch'.
+    :return: List of dictionaries with the period, the withdrawn and block reward amounts in gwei and their counts.
+             Incomplete is True for periods up to a gap left by a truncated crawl of a selected address,
+             whose income may be missing blocks.
+    """
+    if period not in ('day', 'epoch'):
+        raise ValueError(f"Unknown report period: {period}")
+    table = 'daily_income' if period == 'day' else 'epoch_income'
+    if period == 'day':
+        start = start.toordinal() - datetime.date(1970, 1, 1).toordinal() if start is not None else None
+        end = end.toordinal() - datetime.date(1970, 1, 1).toordinal() if end is not None else None
+
+    if addresses is not None:
+        addresses = list(addresses)
+
+    conditions = []
+    params = []
+    if addresses is not None:
+        keys = [normalize_address(address) for address in addresses]
+        conditions.append(f"address IN ({', '.join('?' * len(keys))})")
+        params.extend(keys)
+    if start is not None:
+        conditions.append(f"{period} >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{period} <= ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    rows = connection.execute(
+        f"SELECT {period}, SUM(withdrawals_gwei), SUM(withdrawal_count), SUM(block_rewards_gwei), SUM(block_count) "
+        f"FROM {table} {where} GROUP BY {period} ORDER BY {period}",
+        params
+    ).fetchall()
+
+    gaps = crawl_gaps(connection, addresses)
+    gap_end = max((gap['BeforeTimestamp'] for gap in gaps), default=None)
+    if gap_end is not None:
+        gap_end = gap_end // SECONDS_PER_DAY if period == 'day' else epoch_of(gap_end)
+
+    report = []
+    for value, withdrawals_gwei, withdrawal_count, block_rewards_gwei, block_count in rows:
+        incomplete = gap_end is not None and value <= gap_end
+        if period == 'day':
+            value = datetime.date.fromordinal(datetime.date(1970, 1, 1).toordinal() + value)
+        report.append({
+            period: value,
+            'WithdrawalsGwei': withdrawals_gwei,
+            'WithdrawalCount': withdrawal_count,
+            'BlockRewardsGwei': block_rewards_gwei,
+            'BlockCount': block_count,
+            'TotalGwei': withdrawals_gwei + block_rewards_gwei,
+            'Incomplete': incomplete
+        })
+    return report
+
+if __name__ == "__main__":
+    validator_addresses = ["0xb9d7934878b5fb9610b3fe8a5e441e8fad7e293f"]
+    store = open_income_store()
+    print("Fetched:", refresh_income(store, validator_addresses))
+    for row in income_report(store, validator_addresses)[-7:]:
+        print(row)
+    for gap in crawl_gaps(store, validator_addresses):
+        print("Missing blocks:", gap)